@@ -1,97 +1,102 @@
 import streamlit as st
 import os
-from c_cpp import CToCppTranslator
+import re
+
+def _minify_css(css):
+    """Strip comments and redundant whitespace from a CSS block"""
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    return css.strip()
+
+# Page styling; see _css_blob() for the minified form that gets emitted
+PAGE_CSS = """
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Fira+Code:wght@400;700&family=Montserrat:wght@900&display=swap');
+
+.stApp {
+    background: linear-gradient(135deg, #0f0c29, #302b63, #24243e);
+    color: #ffffff;
+}
 
-def main():
-    st.set_page_config(
-        page_title="✨ C2pp ✨ - C to C++ Transformer",
-        page_icon="🔮",
-        layout="wide",
-        initial_sidebar_state="expanded"
-    )
+h1 {
+    font-family: 'Montserrat', sans-serif;
+    color: #00ff9d !important;
+    text-shadow: 0 0 10px rgba(0, 255, 157, 0.5);
+    text-align: center;
+}
 
-    # Custom CSS for vibrant UI
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Fira+Code:wght@400;700&family=Montserrat:wght@900&display=swap');
-
-    .stApp {
-        background: linear-gradient(135deg, #0f0c29, #302b63, #24243e);
-        color: #ffffff;
-    }
-
-    h1 {
-        font-family: 'Montserrat', sans-serif;
-        color: #00ff9d !important;
-        text-shadow: 0 0 10px rgba(0, 255, 157, 0.5);
-        text-align: center;
-    }
-
-    .stTextArea textarea {
-        background-color: rgba(255, 255, 255, 0.1) !important;
-        color: white !important;
-        font-family: 'Fira Code', monospace !important;
-    }
-
-    .stButton>button {
-        background: linear-gradient(90deg, #ff4d4d, #f9cb28) !important;
-        color: black !important;
-        font-weight: bold !important;
-        border: none !important;
-        box-shadow: 0 4px 15px rgba(249, 203, 40, 0.4);
-        transition: all 0.3s ease !important;
-    }
-
-    .stButton>button:hover {
-        transform: translateY(-2px) !important;
-        box-shadow: 0 6px 20px rgba(249, 203, 40, 0.6) !important;
-    }
-
-    .stMarkdown {
-        color: #ffffff !important;
-    }
-
-    .css-1d391kg {
-        background-color: rgba(255, 255, 255, 0.1) !important;
-        border-radius: 10px !important;
-        padding: 20px !important;
-    }
-    </style>
-    """, unsafe_allow_html=True)
-
-    st.title("✨ C2pp 🔮")
-    # Centered subtitle with custom styling
-    st.markdown("<h3 style='text-align: center; margin-bottom: 20px;'>Transform your <span style='color: #ff4d4d; font-weight: bold;'>C</span> to <span style='color: #00ff9d; font-weight: bold;'>C++</span> instantly!</h3>", unsafe_allow_html=True)
-
-    # Feature list in a container with custom styling
-    with st.container():
-        st.markdown("""
-        ### C2pp converts:
-        - C-style includes to C++ equivalents
-        - #define directives to const declarations
-        - structs to classes
-        - printf/scanf to cout/cin
-        - malloc/free to new/delete
-        - And many other C constructs to their C++ counterparts
-        """)
+.stTextArea textarea {
+    background-color: rgba(255, 255, 255, 0.1) !important;
+    color: white !important;
+    font-family: 'Fira Code', monospace !important;
+}
 
-    # Create two columns for input and output
-    col1, col2 = st.columns(2, gap="large")
+.stButton>button, .stFormSubmitButton>button {
+    background: linear-gradient(90deg, #ff4d4d, #f9cb28) !important;
+    color: black !important;
+    font-weight: bold !important;
+    border: none !important;
+    box-shadow: 0 4px 15px rgba(249, 203, 40, 0.4);
+    transition: all 0.3s ease !important;
+}
 
-    with col1:
-        st.subheader("Input C Code")
-        c_code = st.text_area(
-            "🧙‍♂️ Enter your C spell below:",
-            height=400,
-            placeholder="// Enter your C code here...\n#include <stdio.h>\n\nint main() {\n    printf(\"Hello, World!\\n\");\n    return 0;\n}",
-            help="Paste your C code to transform it into beautiful C++"
-        )
+.stButton>button:hover, .stFormSubmitButton>button:hover {
+    transform: translateY(-2px) !important;
+    box-shadow: 0 6px 20px rgba(249, 203, 40, 0.6) !important;
+}
 
-        translate_button = st.button("✨ Cast Translation Spell ✨", type="primary", use_container_width=True)
+.stMarkdown {
+    color: #ffffff !important;
+}
 
-        # Example code section
-        with st.expander("📜 Ancient C Scrolls (Examples)", expanded=False):
-            example_code = '''#include <stdio.h>
+.css-1d391kg {
+    background-color: rgba(255, 255, 255, 0.1) !important;
+    border-radius: 10px !important;
+    padding: 20px !important;
+}
+</style>
+"""
+
+@st.cache_resource
+def _css_blob():
+    """Minified page CSS, computed once per process rather than every rerun"""
+    return _minify_css(PAGE_CSS)
+
+FEATURES_MD = """
+### C2pp converts:
+- C-style includes to C++ equivalents
+- #define directives to const declarations
+- structs to classes
+- printf/scanf to cout/cin
+- malloc/free to new/delete
+- And many other C constructs to their C++ counterparts
+"""
+
+MAGIC_MD = """
+### 🌈 The Magic Behind the Curtain
+
+The translator analyzes your C code and performs the following transformations:
+
+1. **Header Conversion**: Changes C headers like `stdio.h` to C++ equivalents like `iostream`
+2. **Struct to Class**: Converts C structs to C++ classes with methods
+3. **Memory Management**: Replaces `malloc`/`free` with `new`/`delete`
+4. **I/O Operations**: Converts `printf`/`scanf` to `cout`/`cin`
+5. **Constants**: Transforms `#define` constants to C++ `const` declarations
+
+For best results, ensure your C code is syntactically correct before translation.
+"""
+
+# Static page regions, each emitted with a single st.markdown call
+STATIC_HEADER_HTML = (
+    "<h1>✨ C2pp 🔮</h1>\n\n"
+    "<h3 style='text-align: center; margin-bottom: 20px;'>Transform your <span style='color: #ff4d4d; font-weight: bold;'>C</span> to <span style='color: #00ff9d; font-weight: bold;'>C++</span> instantly!</h3>\n"
+    + FEATURES_MD
+)
+
+STATIC_FOOTER_MD = "---\n" + MAGIC_MD
+
+EXAMPLE_CODE = '''#include <stdio.h>
 #include <stdlib.h>
 
 #define MAX_SIZE 100
@@ -138,60 +143,109 @@ int main() {
 
     return 0;
 }'''
-            st.code(example_code, language="c")
-            if st.button("🔮 Summon Example", key="example_button"):
-                st.session_state.c_code = example_code
-                st.rerun()
 
-    with col2:
-        st.subheader("🌟 C++ Magic Output")
+@st.cache_data(max_entries=128, show_spinner=False)
+def _translated(c_code):
+    """Translate C code, memoized on the source text"""
+    # Imported here so page load doesn't pay for the translator module
+    from c_cpp import get_translator
+    # Each script thread reuses its own translator, so sessions don't wait
+    # on each other
+    return get_translator().translate(c_code)
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def _highlighted(code, language):
+    """Syntax-highlight code to inline-styled HTML, memoized on the source"""
+    from pygments import highlight
+    from pygments.formatters import HtmlFormatter
+    from pygments.lexers import get_lexer_by_name
+
+    formatter = HtmlFormatter(noclasses=True, nowrap=True, style="monokai")
+    body = highlight(code, get_lexer_by_name(language), formatter)
+    # Open with <pre> so markdown treats the whole block as raw HTML,
+    # even across blank lines in the code
+    return (
+        f'<pre style="background: {formatter.style.background_color}; '
+        'padding: 1rem; border-radius: 0.5rem; overflow-x: auto; '
+        f'font-family: \'Fira Code\', monospace;">{body}</pre>'
+    )
 
-        if 'cpp_code' not in st.session_state:
-            st.session_state.cpp_code = ""
+def _load_example():
+    # Runs before the rerun, so the text area picks up the example directly
+    st.session_state.c_code_input = EXAMPLE_CODE
 
-        # Display translated code if available
-        if st.session_state.cpp_code:
-            st.code(st.session_state.cpp_code, language="cpp")
+@st.fragment
+def translate_ui():
+    """Input editor, translate button and output panel"""
+    # Create two columns for input and output
+    col1, col2 = st.columns(2, gap="large")
 
-            # Download button for the translated code
-            st.download_button(
-                label="📥 Capture Magic Code",
-                data=st.session_state.cpp_code,
-                file_name="translated_code.cpp",
-                mime="text/plain"
+    with col1:
+        st.subheader("Input C Code")
+        # Edits are only sent to the server when the form is submitted
+        with st.form("translate_form", border=False):
+            c_code = st.text_area(
+                "🧙‍♂️ Enter your C spell below:",
+                height=400,
+                placeholder="// Enter your C code here...\n#include <stdio.h>\n\nint main() {\n    printf(\"Hello, World!\\n\");\n    return 0;\n}",
+                help="Paste your C code to transform it into beautiful C++",
+                key="c_code_input"
             )
 
-    # Store the example code in session state if button is clicked
-    if 'c_code' in st.session_state:
-        c_code = st.session_state.c_code
-        del st.session_state.c_code
+            translate_button = st.form_submit_button("✨ Cast Translation Spell ✨", type="primary", use_container_width=True)
+
+        # Example code section
+        with st.expander("📜 Ancient C Scrolls (Examples)", expanded=False):
+            st.markdown(_highlighted(EXAMPLE_CODE, "c"), unsafe_allow_html=True)
+            st.button("🔮 Summon Example", key="example_button", on_click=_load_example)
+
+    with col2:
+        st.subheader("🌟 C++ Magic Output")
+        # Filled below once any translation is available
+        output_slot = st.empty()
 
     # Perform translation when button is clicked
     if translate_button and c_code:
         with st.spinner("🔮 Brewing your C++ potion..."):
             try:
-                translator = CToCppTranslator()
-                cpp_code = translator.translate(c_code)
-                st.session_state.cpp_code = cpp_code
-                st.rerun()
+                st.session_state.cpp_code = _translated(c_code)
             except Exception as e:
                 st.error(f"Error during translation: {str(e)}")
 
-    # Add information about the translator
-    st.markdown("---")
-    st.markdown("""
-    ### 🌈 The Magic Behind the Curtain
+    # Display translated code if available, including one produced above
+    cpp_code = st.session_state.get("cpp_code", "")
+    if cpp_code:
+        with output_slot.container():
+            st.markdown(_highlighted(cpp_code, "cpp"), unsafe_allow_html=True)
+
+            # Download button for the translated code; the payload is only
+            # built on click, in a separate thread, so bind it by value here
+            st.download_button(
+                label="📥 Capture Magic Code",
+                data=lambda code=cpp_code: code.encode("utf-8"),
+                file_name="translated_code.cpp",
+                mime="text/plain"
+            )
+
+def main():
+    st.set_page_config(
+        page_title="✨ C2pp ✨ - C to C++ Transformer",
+        page_icon="🔮",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
 
-    The translator analyzes your C code and performs the following transformations:
+    # Custom CSS for vibrant UI
+    st.markdown(_css_blob(), unsafe_allow_html=True)
+
+    # Title, centered subtitle and feature list
+    st.markdown(STATIC_HEADER_HTML, unsafe_allow_html=True)
 
-    1. **Header Conversion**: Changes C headers like `stdio.h` to C++ equivalents like `iostream`
-    2. **Struct to Class**: Converts C structs to C++ classes with methods
-    3. **Memory Management**: Replaces `malloc`/`free` with `new`/`delete`
-    4. **I/O Operations**: Converts `printf`/`scanf` to `cout`/`cin`
-    5. **Constants**: Transforms `#define` constants to C++ `const` declarations
+    # Input/output area reruns on its own when its widgets are used
+    translate_ui()
 
-    For best results, ensure your C code is syntactically correct before translation.
-    """)
+    # Add information about the translator
+    st.markdown(STATIC_FOOTER_MD)
 
 if __name__ == "__main__":
     main()
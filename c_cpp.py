@@ -1,130 +1,334 @@
+from __future__ import annotations
+
+import functools
 import re
 import os
+import sys
+import threading
+from typing import IO, Callable, Iterator
+
+# C headers and their C++ equivalents
+_C_TO_CPP_HEADERS: dict[str, str] = {
+    'stdio.h': 'iostream',
+    'stdlib.h': 'cstdlib',
+    'string.h': 'string',
+    'math.h': 'cmath',
+    'time.h': 'ctime',
+    'assert.h': 'cassert',
+    'ctype.h': 'cctype',
+    'float.h': 'cfloat',
+    'limits.h': 'climits',
+    'locale.h': 'clocale',
+    'signal.h': 'csignal',
+    'stdarg.h': 'cstdarg',
+    'stdbool.h': 'cstdbool',
+    'stddef.h': 'cstddef',
+    'stdint.h': 'cstdint'
+}
+_C_TO_CPP_HEADER_KEYS = _C_TO_CPP_HEADERS.keys()
+
+# Precompiled patterns, shared by every translator instance. Patterns that
+# open with an identifier anchor it with \b, so a long word is only tried
+# from its first character instead of once per character.
+_MAIN_RE = re.compile(r'int\s+main\s*\(')
+_MAIN_SIG_RE = re.compile(r'int\s+main\s*\([^)]*\)')
+_OTHER_FUNC_HEADER_RE = re.compile(r'\b(\w+)\s+(?!main\b)(\w+)\s*\([^)]*\)\s*{')
+_SIMPLE_PROGRAM_RE = re.compile('|'.join((
+    'isPrime',           # Prime number checking
+    'printf.*scanf',     # Simple I/O programs
+    'compoundInterest',  # Compound interest calculator
+    'fibonacci',         # Fibonacci series
+    'factorial',         # Factorial calculator
+    'triangle|square|circle', # Shape calculations
+    'celsius|fahrenheit',     # Temperature conversion
+    'ASCII',             # ASCII table generator
+)), re.IGNORECASE)
+# Includes and defines are collected in one pass over the source
+_DIRECTIVE_RE = re.compile(r'#include\s+<([^>]+)>|#define\s+(\w+)\s+(.+)')
+_GLOBAL_VAR_RE = re.compile(r'(const\s+)?\b(\w+)\s+(\w+)\s*=\s*[^;]+;')
+_STRUCT_RE = re.compile(r'struct\s+(\w+)\s*{([^}]*)}')
+# Functions taking a struct pointer as their first parameter (group 3 is the struct)
+_STRUCT_FUNC_HEADER_RE = re.compile(r'\b(\w+)\s+(\w+)\s*\(\s*struct\s+(\w+)\s*\*\s*(\w+)([^)]*)\)\s*{')
+# Function headers up to the opening brace; bodies are found by brace matching
+_FUNC_HEADER_RE = re.compile(r'\b(\w+)\s+(\w+)\s*\(([^)]*)\)\s*{')
+# Braces plus the string/char literals and comments whose braces don't count
+_BRACE_TOKEN_RE = re.compile(r'"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|//[^\n]*|/\*.*?(?:\*/|\Z)|[{}]', re.S)
+_MALLOC_RE = re.compile(r'\b(\w+)\s*=\s*\((\w+)\s*\*\)\s*malloc\(sizeof\((\w+)\)\s*\*\s*(\w+)\);')
+_SINGLE_MALLOC_RE = re.compile(r'\b(\w+)\s*=\s*\((\w+)\s*\*\)\s*malloc\(sizeof\((\w+)\)\);')
+_PRINTF_RE = re.compile(r'printf\("([^"\\]*(?:\\.[^"\\]*)*)"(?:\s*,\s*([^;]*))?\);')
+_PRECISION_RE = re.compile(r'%\.(\d+)([fg])')
+_FMT_SPLIT_RE = re.compile(r'(%[diouxXfFeEgGaAcspn]|%\.\d+[fg])')
+_FMT_SPEC_RE = re.compile(r'%[diouxXfFeEgGaAcspn]')
+_SCANF_RE = re.compile(r'scanf\("([^"]+)",\s*([^)]+)\);')
+# C math functions that get the std:: prefix in C++
+_MATH_RE = re.compile(r'\b(' + '|'.join((
+    'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'atan2',
+    'sinh', 'cosh', 'tanh', 'exp', 'log', 'log10', 'pow',
+    'sqrt', 'ceil', 'floor', 'fabs', 'fmod'
+)) + r')\(')
+_SWAP_RE = re.compile(r'void\s+swap\s*\(\s*(\w+)\s*\*\s*a\s*,\s*(\w+)\s*\*\s*b\s*\)')
+_SWAP_IMPL_RE = re.compile(r'void\s+swap\s*\(\s*(\w+)\s*\*\s*a\s*,\s*(\w+)\s*\*\s*b\s*\)\s*{([^}]*)}')
+_FREE_RE = re.compile(r'free\((\w+)\);')
+# Rewrite rules applied to a function body in one scan. At any position the
+# earliest rule wins, matching the order the rewrites used to run in.
+_BODY_REWRITE_RULES = {
+    'malloc': _MALLOC_RE,
+    'single_malloc': _SINGLE_MALLOC_RE,
+    'free': _FREE_RE,
+    'printf': _PRINTF_RE,
+    'scanf': _SCANF_RE,
+    'math': _MATH_RE,
+}
+_BODY_REWRITE_RE = re.compile('|'.join(
+    f'(?P<{name}>{pattern.pattern})' for name, pattern in _BODY_REWRITE_RULES.items()
+))
+_FUNC_PTR_RE = re.compile(r'\b(\w+)\s+\(\*(\w+)\)\(([^)]*)\)\s*=\s*(.+);')
+
+# Output templates, one format call per emitted class, method or function
+_CLASS_TEMPLATE = """// Class converted from struct {name}
+class {name} {{
+public:
+{fields}
+{indent}// Constructor
+{indent}{name}() {{}}{methods}
+}};"""
+_METHOD_TEMPLATE = """{return_type} {struct_name}::{name}({params}) {{
+{body}
+}}"""
+_FUNCTION_TEMPLATE = """// C++ style function
+{return_type} {name}({params}) {{
+{body}
+}}
+"""
+
+def _find_balanced_braces(code: str, start: int) -> tuple[int, int] | None:
+    """Return the (start, end) span of the body whose `{` is at code[start]"""
+    depth = 0
+    for token in _BRACE_TOKEN_RE.finditer(code, start):
+        if token.group() == '{':
+            depth += 1
+        elif token.group() == '}':
+            depth -= 1
+            if depth == 0:
+                return start + 1, token.start()
+    return None
+
+def _iter_function_blocks(header_re: re.Pattern[str], code: str) -> Iterator[tuple[re.Match[str], int, int]]:
+    """Yield (header match, body start, body end) for each function in code"""
+    pos = 0
+    while True:
+        header = header_re.search(code, pos)
+        if not header:
+            return
+        span = _find_balanced_braces(code, header.end() - 1)
+        if span is None:
+            # The body runs unclosed to the end of the code, so everything
+            # after this header is inside it rather than at the top level
+            return
+        yield header, span[0], span[1]
+        pos = span[1] + 1
+
+def _printf_to_cout(match: re.Match[str]) -> str:
+    """Rewrite a printf call as an equivalent cout expression"""
+    format_str, args = match.groups()
+
+    if not args:
+        # Simple string with no arguments
+        if format_str.endswith("\\n"):
+            return f'cout << "{format_str[:-2]}" << endl;'
+        return f'cout << "{format_str}";'
+
+    # Handle format specifiers
+    fmt_parts = [p for p in _FMT_SPLIT_RE.split(format_str) if p]  # Remove empty strings
+    arg_list = [arg.strip() for arg in args.split(',')]
+
+    parts = ['cout']
+    arg_idx = 0
+
+    for part in fmt_parts:
+        # Check if this is a floating point format with precision
+        fp_precision_match = _PRECISION_RE.match(part)
+        if fp_precision_match:
+            # This is a floating point with precision, use fixed and setprecision
+            if arg_idx < len(arg_list):
+                precision_val = fp_precision_match.group(1)
+                parts.append(f'fixed << setprecision({precision_val}) << {arg_list[arg_idx]}')
+                arg_idx += 1
+        elif _FMT_SPEC_RE.match(part):
+            # This is a regular format specifier
+            if arg_idx < len(arg_list):
+                parts.append(arg_list[arg_idx])
+                arg_idx += 1
+        else:
+            # This is regular text
+            parts.append(f'"{part}"')
+
+    # Add endl if the format string ends with \n
+    if format_str.endswith("\\n"):
+        parts.append('endl')
+
+    return ' << '.join(parts) + ';'
+
+def _scanf_to_cin(match: re.Match[str]) -> str:
+    """Rewrite a scanf call as one cin statement per argument"""
+    args = match.group(2)
+    cin_parts = []
+    for arg in args.split(','):
+        arg = arg.strip()
+        if arg.startswith('&'):
+            arg = arg[1:]  # Remove the '&'
+        cin_parts.append(f'cin >> {arg}; ')
+    return ''.join(cin_parts)
 
 class CToCppTranslator:
-    def __init__(self):
+    __slots__ = (
+        'indent_str', 'includes', 'defines', 'structs', 'struct_to_functions',
+        'global_variables', 'malloc_variables', 'main_function',
+        'file_scoped_functions', 'needs_iomanip',
+    )
+
+    def __init__(self) -> None:
         self.indent_str = "    "
-        self.includes = set()
-        self.defines = {}  # Store #define directives
-        self.structs = {}  # Store struct definitions for potential class conversion
-        self.struct_to_functions = {}  # Map structs to their related functions
-        self.global_variables = set()
-        self.malloc_variables = set()  # Track variables allocated with malloc
+        self.includes: set[str] = set()
+        self.defines: dict[str, str] = {}  # Store #define directives
+        self.structs: dict[str, str] = {}  # Store struct definitions for potential class conversion
+        self.struct_to_functions: dict[str, list[dict[str, str]]] = {}  # Map structs to their related functions
+        self.global_variables: set[tuple[str, str, str]] = set()
+        self.malloc_variables: dict[str, bool] = {}  # Variables malloc'd anywhere in the code, True for arrays
         self.main_function = ""
-        self.file_scoped_functions = {}  # Functions with static keyword
+        self.file_scoped_functions: dict[str, str] = {}  # Functions with static keyword
         self.needs_iomanip = False  # Track if we need the iomanip header
+
+    def reset(self) -> None:
+        """Clear per-translation state in place so one instance can be reused"""
+        self.includes.clear()
+        self.defines.clear()
+        self.structs.clear()
+        self.struct_to_functions.clear()
+        self.global_variables.clear()
+        self.malloc_variables.clear()
+        self.main_function = ""
+        self.file_scoped_functions.clear()
+        self.needs_iomanip = False
         
-    def translate(self, c_code):
-        """Main translation function to convert C code to C++"""
-        self.identify_includes(c_code)
-        self.identify_defines(c_code)
+    def translate(self, c_code: str, out: IO[str] | None = None) -> str:
+        """Main translation function to convert C code to C++
+
+        If `out` is given, the lines are written to it as they are produced
+        and an empty string is returned instead of the whole program.
+        """
+        lines = self._translate_lines(c_code)
+        if out is None:
+            return '\n'.join(lines)
+        for line in lines:
+            out.write(line + '\n')
+        return ''
+    
+    def _translate_lines(self, c_code: str) -> Iterator[str]:
+        """Generate the translated C++ program line by line"""
+        self.reset()
+        self.identify_directives(c_code)
+        # Record allocations up front, so a free is rewritten even when it
+        # comes before its malloc in the text or lives in another function
+        self._record_malloc_variables(c_code)
         
         # Skip global variable detection for specific scenarios
         if self._is_simple_program(c_code):
-            self.global_variables = set()  # Clear any detected globals
+            self.global_variables.clear()  # Clear any detected globals
         else:
             self.identify_global_variables(c_code)
             
         self.identify_structs(c_code)
         self.identify_struct_functions(c_code)
         
-        cpp_code = []
-        
         # Add C++ style includes
-        cpp_code.extend(self._translate_includes())
-        cpp_code.append("")  # Empty line after includes
+        yield from self._translate_includes()
+        yield ""  # Empty line after includes
         
         # Add #define directives as const declarations
         define_lines = self._translate_defines()
         if define_lines:
-            cpp_code.extend(define_lines)
-            cpp_code.append("")  # Empty line after defines
+            yield from define_lines
+            yield ""  # Empty line after defines
         
         # Add namespace std
-        cpp_code.append("// Using standard namespace")
-        cpp_code.append("using namespace std;")
+        yield "// Using standard namespace"
+        yield "using namespace std;"
         
         # If math.h is included, add special math constants
         if 'math.h' in self.includes and 'PI' not in self.defines:
-            cpp_code.append("")
-            cpp_code.append("// Common math constants")
-            cpp_code.append("const double PI = 3.14159265358979323846;")
-            cpp_code.append("const double E = 2.71828182845904523536;")
+            yield ""
+            yield "// Common math constants"
+            yield "const double PI = 3.14159265358979323846;"
+            yield "const double E = 2.71828182845904523536;"
         
-        cpp_code.append("")  # Empty line after namespace
+        yield ""  # Empty line after namespace
         
         # Add class definitions (converted from structs)
         class_definitions = self._translate_structs_to_classes()
         if class_definitions:
-            cpp_code.extend(class_definitions)
-            cpp_code.append("")  # Empty line after class definitions
+            yield from class_definitions
+            yield ""  # Empty line after class definitions
         
         # Add global variables (with more C++ style)
         global_vars = self._translate_global_variables()
         if global_vars:
-            cpp_code.extend(global_vars)
-            cpp_code.append("")  # Empty line after global variables
+            yield from global_vars
+            yield ""  # Empty line after global variables
             
         # Add function implementations
         function_implementations = self._translate_functions(c_code)
         if function_implementations:
-            cpp_code.extend(function_implementations)
+            yield from function_implementations
             
         # Add main function
         main_function = self._translate_main_function(c_code)
         if main_function:
-            cpp_code.extend(main_function)
-        
-        return '\n'.join(cpp_code)
+            yield from main_function
     
-    def _is_simple_program(self, c_code):
+    def _is_simple_program(self, c_code: str) -> bool:
         """Check if this is a simple program where variables should be local to main"""
+        # Check typical patterns of simple programs first; most inputs stop here
+        if not _SIMPLE_PROGRAM_RE.search(c_code):
+            return False
+
         # Check if there's just one int main() function with all variables defined inside
-        main_count = len(re.findall(r'int\s+main\s*\(', c_code))
-        if main_count != 1:
+        first_main = _MAIN_RE.search(c_code)
+        if first_main is None or _MAIN_RE.search(c_code, first_main.end()):
             return False
             
         # Check if there's any function definition other than main
-        other_funcs = re.findall(r'(\w+)\s+(\w+)\s*\([^)]*\)\s*{', c_code)
-        other_func_count = sum(1 for func in other_funcs if func[1] != 'main')
-        
-        if other_func_count > 0:
-            return False
-            
-        # Check typical patterns of simple programs
-        simple_patterns = [
-            'isPrime',           # Prime number checking
-            'printf.*scanf',     # Simple I/O programs
-            'compoundInterest',  # Compound interest calculator
-            'fibonacci',         # Fibonacci series
-            'factorial',         # Factorial calculator
-            'triangle|square|circle', # Shape calculations
-            'celsius|fahrenheit',     # Temperature conversion
-            'ASCII',             # ASCII table generator
-        ]
-        
-        for pattern in simple_patterns:
-            if re.search(pattern, c_code, re.IGNORECASE):
-                return True
-                
-        return False
+        return not _OTHER_FUNC_HEADER_RE.search(c_code)
 
-    def identify_includes(self, c_code):
-        """Extract and convert C style includes to C++ style"""
-        include_pattern = r'#include\s+<([^>]+)>'
-        self.includes = set(re.findall(include_pattern, c_code))
+    def identify_directives(self, c_code: str) -> None:
+        """Extract #include and #define directives"""
+        for include, name, value in _DIRECTIVE_RE.findall(c_code):
+            if include:
+                self.includes.add(include)
+            else:
+                self.defines[name] = value.strip()
         
-        # Check if we need iomanip for formatting
-        if re.search(r'%\.[0-9]+[fg]', c_code):
+        # Check if we need iomanip for formatting; kept as its own search since
+        # a format string may sit inside a #define value
+        if _PRECISION_RE.search(c_code):
             self.needs_iomanip = True
+    
+    def identify_includes(self, c_code: str) -> None:
+        """Extract C style includes; kept for callers of the separate passes"""
+        self.includes.clear()
+        self.includes.update(include for include, _, _ in _DIRECTIVE_RE.findall(c_code) if include)
         
-    def identify_defines(self, c_code):
-        """Extract #define directives"""
-        define_pattern = r'#define\s+(\w+)\s+(.+)'
-        for name, value in re.findall(define_pattern, c_code):
-            self.defines[name] = value.strip()
+        # Check if we need iomanip for formatting
+        if _PRECISION_RE.search(c_code):
+            self.needs_iomanip = True
+    
+    def identify_defines(self, c_code: str) -> None:
+        """Extract #define directives; kept for callers of the separate passes"""
+        for include, name, value in _DIRECTIVE_RE.findall(c_code):
+            if not include:
+                self.defines[name] = value.strip()
             
-    def _translate_defines(self):
+    def _translate_defines(self) -> list[str]:
         """Convert #define to C++ constants"""
         cpp_defines = []
         if self.defines:
@@ -141,29 +345,11 @@ class CToCppTranslator:
                     cpp_defines.append(f"const auto {name} = {value};")
         return cpp_defines
         
-    def _translate_includes(self):
+    def _translate_includes(self) -> list[str]:
         """Convert C headers to their C++ equivalents"""
         cpp_includes = []
         cpp_includes.append("// C++ style includes")
         
-        c_to_cpp_headers = {
-            'stdio.h': 'iostream',
-            'stdlib.h': 'cstdlib',
-            'string.h': 'string',
-            'math.h': 'cmath',
-            'time.h': 'ctime',
-            'assert.h': 'cassert',
-            'ctype.h': 'cctype',
-            'float.h': 'cfloat',
-            'limits.h': 'climits',
-            'locale.h': 'clocale',
-            'signal.h': 'csignal',
-            'stdarg.h': 'cstdarg',
-            'stdbool.h': 'cstdbool',
-            'stddef.h': 'cstddef',
-            'stdint.h': 'cstdint'
-        }
-        
         # Add iomanip for fixed-precision output
         if self.needs_iomanip:
             cpp_includes.append("#include <iomanip>")
@@ -175,30 +361,31 @@ class CToCppTranslator:
         # Always add algorithm for std::swap
         cpp_includes.append("#include <algorithm>")
         
-        for include in self.includes:
-            if include == 'functional':
-                continue  # Already added above
-            elif include in c_to_cpp_headers:
-                cpp_includes.append(f"#include <{c_to_cpp_headers[include]}>")
-            else:
-                # Keep original if no mapping exists
-                cpp_includes.append(f"#include <{include}>")
-                
+        mapped = self.includes & _C_TO_CPP_HEADER_KEYS
+        unmapped = self.includes - _C_TO_CPP_HEADER_KEYS - {'functional'}  # functional already added above
+        cpp_includes.extend(f"#include <{_C_TO_CPP_HEADERS[include]}>" for include in sorted(mapped))
+        # Keep original if no mapping exists
+        cpp_includes.extend(f"#include <{include}>" for include in sorted(unmapped))
+        
         return cpp_includes
         
-    def identify_global_variables(self, c_code):
+    def identify_global_variables(self, c_code: str) -> None:
         """Identify global variables in C code"""
-        # Get all lines outside of functions
-        function_blocks = re.findall(r'(\w+\s+\w+\s*\([^)]*\)\s*{[^{}]*(?:{[^{}]*}[^{}]*)*})', c_code)
-        remaining_code = c_code
-        for block in function_blocks:
-            remaining_code = remaining_code.replace(block, '')
+        # Get all lines outside of functions, stitching together the gaps
+        # between function blocks in a single pass
+        remaining_parts = []
+        last_end = 0
+        for header, _, body_end in _iter_function_blocks(_FUNC_HEADER_RE, c_code):
+            remaining_parts.append(c_code[last_end:header.start()])
+            last_end = body_end + 1
+        remaining_parts.append(c_code[last_end:])
+        remaining_code = ''.join(remaining_parts)
         
         # Look for variable declarations
-        var_pattern = r'(const\s+)?(\w+)\s+(\w+)\s*=\s*[^;]+;'
-        self.global_variables = set(re.findall(var_pattern, remaining_code))
+        self.global_variables.clear()
+        self.global_variables.update(_GLOBAL_VAR_RE.findall(remaining_code))
         
-    def _translate_global_variables(self):
+    def _translate_global_variables(self) -> list[str]:
         """Convert global variables to C++ style"""
         cpp_globals = []
         if self.global_variables:
@@ -208,99 +395,89 @@ class CToCppTranslator:
                 cpp_globals.append(f"{const}{type_name} {var_name};")
         return cpp_globals
     
-    def identify_structs(self, c_code):
+    def identify_structs(self, c_code: str) -> None:
         """Identify struct definitions for potential conversion to classes"""
-        struct_pattern = r'struct\s+(\w+)\s*{([^}]*)}'
-        for struct_name, struct_body in re.findall(struct_pattern, c_code):
+        for struct_name, struct_body in _STRUCT_RE.findall(c_code):
             self.structs[struct_name] = struct_body.strip()
             self.struct_to_functions[struct_name] = []
             
-    def identify_struct_functions(self, c_code):
+    def identify_struct_functions(self, c_code: str) -> None:
         """Find functions that operate on structs (potential class methods)"""
-        for struct_name in self.structs:
-            # Look for functions that take struct as first parameter
-            function_pattern = rf'(\w+)\s+(\w+)\s*\(\s*struct\s+{struct_name}\s*\*\s*(\w+)([^)]*)\)\s*{{([^}}]*)}}'
-            for return_type, func_name, struct_param, other_params, func_body in re.findall(function_pattern, c_code):
+        # Look for functions that take struct as first parameter, in one pass
+        # for all structs
+        for header, body_start, body_end in _iter_function_blocks(_STRUCT_FUNC_HEADER_RE, c_code):
+            return_type, func_name, struct_name, struct_param, other_params = header.groups()
+            if struct_name in self.struct_to_functions:
                 self.struct_to_functions[struct_name].append({
                     'name': func_name,
                     'return_type': return_type,
                     'param_name': struct_param,
                     'other_params': other_params,
-                    'body': func_body
+                    'body': c_code[body_start:body_end]
                 })
     
-    def _translate_structs_to_classes(self):
+    def _translate_structs_to_classes(self) -> list[str]:
         """Convert C structs to C++ classes"""
         class_defs = []
         
+        indent = self.indent_str
+        
         for struct_name, struct_body in self.structs.items():
-            class_defs.append(f"// Class converted from struct {struct_name}")
-            class_defs.append(f"class {struct_name} {{")
-            class_defs.append("public:")
-            
-            # Add struct fields as class members
-            for line in struct_body.split(';'):
-                if line.strip():
-                    class_defs.append(f"{self.indent_str}{line.strip()};")
-            
-            # Add constructor
-            class_defs.append(f"\n{self.indent_str}// Constructor")
-            class_defs.append(f"{self.indent_str}{struct_name}() {{}}")
+            # Add struct fields as class members, each ending its own line
+            fields = ''.join(
+                f"{indent}{line.strip()};\n"
+                for line in struct_body.split(';') if line.strip()
+            )
             
             # Add methods converted from related functions
-            if struct_name in self.struct_to_functions and self.struct_to_functions[struct_name]:
-                class_defs.append(f"\n{self.indent_str}// Methods")
-                for func in self.struct_to_functions[struct_name]:
-                    # Skip the first parameter (which is the struct pointer)
-                    params = func['other_params'].strip()
-                    
-                    # Method declaration
-                    class_defs.append(f"{self.indent_str}{func['return_type']} {func['name']}({params});")
+            funcs = self.struct_to_functions.get(struct_name)
+            methods = ""
+            if funcs:
+                # Skip the first parameter (which is the struct pointer)
+                methods = f"\n\n{indent}// Methods" + ''.join(
+                    f"\n{indent}{func['return_type']} {func['name']}({func['other_params'].strip()});"
+                    for func in funcs
+                )
             
-            class_defs.append("};")
+            class_defs.append(_CLASS_TEMPLATE.format(
+                name=struct_name, fields=fields, indent=indent, methods=methods
+            ))
             
             # Now implement the methods
-            if struct_name in self.struct_to_functions and self.struct_to_functions[struct_name]:
-                class_defs.append(f"\n// Method implementations for class {struct_name}")
-                for func in self.struct_to_functions[struct_name]:
-                    params = func['other_params'].strip()
-                    
+            if funcs:
+                implementations = [f"\n// Method implementations for class {struct_name}"]
+                for func in funcs:
                     # Convert function body to use 'this' instead of struct pointer
                     body = func['body']
                     body = body.replace(f"{func['param_name']}>", "this->")
                     body = body.replace(f"{func['param_name']}.", "this.")
                     
-                    class_defs.append(f"{func['return_type']} {struct_name}::{func['name']}({params}) {{")
-                    class_defs.append(f"{body}")
-                    class_defs.append("}")
+                    implementations.append(_METHOD_TEMPLATE.format(
+                        return_type=func['return_type'], struct_name=struct_name,
+                        name=func['name'], params=func['other_params'].strip(), body=body
+                    ))
+                class_defs.append('\n'.join(implementations))
         
         return class_defs
         
-    def _translate_functions(self, c_code):
+    def _translate_functions(self, c_code: str) -> list[str]:
         """Convert regular C functions to C++ style"""
         function_implementations = []
+        struct_params = [f"struct {struct_name} *" for struct_name in self.structs]
         
         # Regular function pattern (non-struct related)
-        func_pattern = r'(\w+)\s+(\w+)\s*\(([^)]*)\)\s*{([^{}]*(?:{[^{}]*}[^{}]*)*?)}'
-        
-        for return_type, func_name, params, body in re.findall(func_pattern, c_code):
+        for header, body_start, body_end in _iter_function_blocks(_FUNC_HEADER_RE, c_code):
+            return_type, func_name, params = header.groups()
+            body = c_code[body_start:body_end]
+            
             # Skip main function (handled separately)
             if func_name == 'main':
                 continue
                 
             # Skip struct-related functions (handled in class conversion)
-            is_struct_func = False
-            for struct_name in self.structs:
-                if f"struct {struct_name} *" in params:
-                    is_struct_func = True
-                    break
-            
-            if is_struct_func:
+            if any(struct_param in params for struct_param in struct_params):
                 continue
                 
-            # Convert C function to C++ style
-            function_implementations.append(f"// C++ style function")
-            
             # Update parameter types (for example, add const for string params)
             cpp_params = []
             for param in params.split(','):
@@ -316,132 +493,27 @@ class CToCppTranslator:
             # Process function body
             cpp_body = self._process_function_body(body)
             
-            function_implementations.append(f"{return_type} {func_name}({', '.join(cpp_params)}) {{")
-            function_implementations.append(cpp_body)
-            function_implementations.append("}")
-            function_implementations.append("")  # Empty line between functions
+            # Convert C function to C++ style, with an empty line after it
+            function_implementations.append(_FUNCTION_TEMPLATE.format(
+                return_type=return_type, name=func_name,
+                params=', '.join(cpp_params), body=cpp_body
+            ))
             
         return function_implementations
     
-    def _process_function_body(self, body):
+    def _process_function_body(self, body: str) -> str:
         """Process function body to convert C constructs to C++"""
-        cpp_body = body
-        
-        # Replace malloc with new
-        malloc_pattern = r'(\w+)\s*=\s*\((\w+)\s*\*\)\s*malloc\(sizeof\((\w+)\)\s*\*\s*(\w+)\);'
-        for var_name, type_name, alloc_type, size in re.findall(malloc_pattern, cpp_body):
-            self.malloc_variables.add(var_name)
-            replacement = f"{var_name} = new {alloc_type}[{size}];"
-            cpp_body = cpp_body.replace(f"{var_name} = ({type_name} *)malloc(sizeof({alloc_type}) * {size});", replacement)
-        
-        # Handle single object malloc
-        single_malloc_pattern = r'(\w+)\s*=\s*\((\w+)\s*\*\)\s*malloc\(sizeof\((\w+)\)\);'
-        for var_name, type_name, alloc_type in re.findall(single_malloc_pattern, cpp_body):
-            self.malloc_variables.add(var_name)
-            replacement = f"{var_name} = new {alloc_type};"
-            cpp_body = cpp_body.replace(f"{var_name} = ({type_name} *)malloc(sizeof({alloc_type}));", replacement)
-        
-        # Replace free with delete - distinguish between array and single object
-        for var in self.malloc_variables:
-            # Check if it looks like an array allocation
-            if f"{var} = new " in cpp_body and f"{var}[" in cpp_body:
-                cpp_body = cpp_body.replace(f"free({var});", f"delete[] {var};")
-            else:
-                cpp_body = cpp_body.replace(f"free({var});", f"delete {var};")
-        
-        # Replace printf with cout - FIXED REGEX PATTERN for floating point precision and character display
-        printf_pattern = r'printf\("([^"\\]*(?:\\.[^"\\]*)*)"(?:\s*,\s*([^;]*))?\);'
-        for match in re.finditer(printf_pattern, cpp_body):
-            format_str, args = match.groups()
-            original_printf = match.group(0)
-            
-            if args:
-                # Check for precision formatting like %.2f
-                precision_match = re.search(r'%\.(\d+)([fg])', format_str)
-                precision = None
-                if precision_match:
-                    precision = precision_match.group(1)  # The number after the dot
-                    
-                # Handle format specifiers
-                fmt_parts = re.split(r'(%[diouxXfFeEgGaAcspn]|%\.\d+[fg])', format_str)
-                fmt_parts = [p for p in fmt_parts if p]  # Remove empty strings
-                arg_list = [arg.strip() for arg in args.split(',')]
-                
-                cout_expr = 'cout << '
-                arg_idx = 0
-                
-                for part in fmt_parts:
-                    # Check if this is a floating point format with precision
-                    fp_precision_match = re.match(r'%\.(\d+)([fg])', part)
-                    if fp_precision_match:
-                        # This is a floating point with precision, use fixed and setprecision
-                        if arg_idx < len(arg_list):
-                            precision_val = fp_precision_match.group(1)
-                            cout_expr += f'fixed << setprecision({precision_val}) << {arg_list[arg_idx]} << '
-                            arg_idx += 1
-                    elif re.match(r'%[diouxXfFeEgGaAcspn]', part):
-                        # This is a regular format specifier
-                        if arg_idx < len(arg_list):
-                            cout_expr += f"{arg_list[arg_idx]} << "
-                            arg_idx += 1
-                    else:
-                        # This is regular text
-                        cout_expr += f'"{part}" << '
-                
-                # Add endl if the format string ends with \n
-                if format_str.endswith("\\n"):
-                    cout_expr += 'endl;'
-                else:
-                    # Remove the last " << "
-                    cout_expr = cout_expr[:-4] + ';'
-                
-                cpp_body = cpp_body.replace(original_printf, cout_expr)
-            else:
-                # Simple string with no arguments
-                if format_str.endswith("\\n"):
-                    cpp_body = cpp_body.replace(original_printf, f'cout << "{format_str[:-2]}" << endl;')
-                else:
-                    cpp_body = cpp_body.replace(original_printf, f'cout << "{format_str}";')
-        
-        # Replace scanf with cin
-        scanf_pattern = r'scanf\("([^"]+)",\s*([^)]+)\);'
-        for format_str, args in re.findall(scanf_pattern, cpp_body):
-            original_scanf = f'scanf("{format_str}", {args});'
-            arg_list = [arg.strip() for arg in args.split(',')]
-            cin_expr = ''
-            for arg in arg_list:
-                if arg.startswith('&'):
-                    arg = arg[1:]  # Remove the '&'
-                cin_expr += f'cin >> {arg}; '
-            
-            cpp_body = cpp_body.replace(original_scanf, cin_expr)
-        
-        # Handle math function calls
-        if 'math.h' in self.includes:
-            # Map of C math functions to C++ equivalents
-            math_functions = [
-                'sin', 'cos', 'tan', 'asin', 'acos', 'atan', 'atan2',
-                'sinh', 'cosh', 'tanh', 'exp', 'log', 'log10', 'pow',
-                'sqrt', 'ceil', 'floor', 'fabs', 'fmod'
-            ]
-            
-            # Replace direct math function calls
-            for func in math_functions:
-                # Look for the function with parentheses to avoid partial matches
-                pattern = r'\b' + func + r'\('
-                if re.search(pattern, cpp_body):
-                    # Replace with std:: namespace but only if there's a match
-                    cpp_body = re.sub(pattern, f'std::{func}(', cpp_body)
+        # Convert malloc/free, printf/scanf and math calls in a single scan
+        has_math = 'math.h' in self.includes
+        cpp_body = _BODY_REWRITE_RE.sub(lambda match: self._rewrite_body_token(match, has_math), body)
         
         # Detect and convert swap functions to std::swap
-        swap_pattern = r'void\s+swap\s*\(\s*(\w+)\s*\*\s*a\s*,\s*(\w+)\s*\*\s*b\s*\)'
-        swap_match = re.search(swap_pattern, cpp_body)
+        swap_match = _SWAP_RE.search(cpp_body)
         if swap_match:
             type_name = swap_match.group(1)
             
             # Look for swap function implementation
-            swap_impl_pattern = r'void\s+swap\s*\(\s*(\w+)\s*\*\s*a\s*,\s*(\w+)\s*\*\s*b\s*\)\s*{([^}]*)}'
-            swap_impl_match = re.search(swap_impl_pattern, cpp_body)
+            swap_impl_match = _SWAP_IMPL_RE.search(cpp_body)
             
             if swap_impl_match:
                 impl_body = swap_impl_match.group(3)
@@ -450,12 +522,11 @@ class CToCppTranslator:
                 if 'temp' in impl_body and '*a' in impl_body and '*b' in impl_body:
                     # Replace with std::swap template function
                     replacement = f"// Use C++ std::swap instead of custom implementation\ntemplate<typename T>\nvoid swap(T* a, T* b) {{\n    std::swap(*a, *b);\n}}"
-                    cpp_body = re.sub(swap_impl_pattern, replacement, cpp_body)
+                    cpp_body = _SWAP_IMPL_RE.sub(replacement, cpp_body)
                 
         # Convert function pointer declarations from C to C++ style
         # Example: void (*func_ptr)(int) = &func; -> function<void(int)> func_ptr = &func;
-        func_ptr_pattern = r'(\w+)\s+\(\*(\w+)\)\(([^)]*)\)\s*=\s*(.+);'
-        for return_type, ptr_name, params, func_ref in re.findall(func_ptr_pattern, cpp_body):
+        for return_type, ptr_name, params, func_ref in _FUNC_PTR_RE.findall(cpp_body):
             cpp_params = []
             if params.strip():
                 for param in params.split(','):
@@ -466,11 +537,10 @@ class CToCppTranslator:
             # Use std::function for modern C++ style
             cpp_params_str = ', '.join(cpp_params)
             replacement = f"function<{return_type}({cpp_params_str})> {ptr_name} = {func_ref};"
-            cpp_body = re.sub(func_ptr_pattern, replacement, cpp_body, count=1)
+            cpp_body = _FUNC_PTR_RE.sub(replacement, cpp_body, count=1)
             
             # Add required include
-            if not any("functional" in include for include in self.includes):
-                self.includes.add("functional")
+            self.includes.add("functional")
         
         # Apply defined constants (e.g., replace PI with PI)
         for define_name, define_value in self.defines.items():
@@ -480,11 +550,65 @@ class CToCppTranslator:
             
         return cpp_body
     
-    def _translate_main_function(self, c_code):
+    def _rewrite_body_token(self, match: re.Match[str], has_math: bool) -> str:
+        """Dispatch one match of _BODY_REWRITE_RE to the rewrite for its rule"""
+        kind = match.lastgroup
+        assert kind is not None  # Every alternative is a named group
+        token = match.group(0)
+        
+        if kind == 'math':
+            # Replace direct math function calls with the std:: versions
+            return f"std::{token}" if has_math else token
+        
+        # Re-match the token alone to get the rule's own groups
+        token_match = _BODY_REWRITE_RULES[kind].fullmatch(token)
+        assert token_match is not None  # The token is exactly what this rule matched
+        
+        if kind == 'malloc':
+            # Replace malloc with new
+            return self._array_malloc_to_new(token_match)
+        if kind == 'single_malloc':
+            # Handle single object malloc
+            return self._single_malloc_to_new(token_match)
+        if kind == 'free':
+            # Replace free with delete - distinguish between array and single object
+            var = token_match.group(1)
+            is_array = self.malloc_variables.get(var)
+            if is_array is None:
+                return token
+            return f"delete[] {var};" if is_array else f"delete {var};"
+        
+        # Replace printf with cout / scanf with cin; their arguments may
+        # themselves contain math calls
+        if kind == 'printf':
+            cpp_token = _printf_to_cout(token_match)
+        else:
+            cpp_token = _scanf_to_cin(token_match)
+        if has_math:
+            cpp_token = _MATH_RE.sub(r'std::\1(', cpp_token)
+        return cpp_token
+    
+    def _record_malloc_variables(self, code: str) -> None:
+        """Note each variable that code allocates with malloc, and whether as an array"""
+        for match in _SINGLE_MALLOC_RE.finditer(code):
+            self.malloc_variables[match.group(1)] = False
+        for match in _MALLOC_RE.finditer(code):
+            self.malloc_variables[match.group(1)] = True
+    
+    def _array_malloc_to_new(self, match: re.Match[str]) -> str:
+        """Rewrite `x = (T *)malloc(sizeof(T) * n);` as `x = new T[n];`"""
+        var_name, _, alloc_type, size = match.groups()
+        return f"{var_name} = new {alloc_type}[{size}];"
+    
+    def _single_malloc_to_new(self, match: re.Match[str]) -> str:
+        """Rewrite `x = (T *)malloc(sizeof(T));` as `x = new T;`"""
+        var_name, _, alloc_type = match.groups()
+        return f"{var_name} = new {alloc_type};"
+    
+    def _translate_main_function(self, c_code: str) -> list[str]:
         """Process the main function separately using a more robust approach"""
         # First find the main function signature
-        main_signature_pattern = r'int\s+main\s*\([^)]*\)'
-        signature_match = re.search(main_signature_pattern, c_code)
+        signature_match = _MAIN_SIG_RE.search(c_code)
         
         if not signature_match:
             return []
@@ -497,24 +621,13 @@ class CToCppTranslator:
         if open_brace_pos == -1:
             return []
         
-        # Find the matching closing brace by counting
-        brace_count = 1
-        close_brace_pos = -1
-        
-        for i in range(open_brace_pos + 1, len(c_code)):
-            if c_code[i] == '{':
-                brace_count += 1
-            elif c_code[i] == '}':
-                brace_count -= 1
-                if brace_count == 0:
-                    close_brace_pos = i
-                    break
-        
-        if close_brace_pos == -1:
+        # Find the matching closing brace
+        span = _find_balanced_braces(c_code, open_brace_pos)
+        if span is None:
             return []
         
         # Extract the function body
-        body = c_code[open_brace_pos + 1:close_brace_pos]
+        body = c_code[span[0]:span[1]]
         
         main_function = []
         main_function.append("// Main function")
@@ -528,30 +641,23 @@ class CToCppTranslator:
         
         return main_function
 
-def main():
-    translator = CToCppTranslator()
-    
-    print("===== C to C++ Language Translator =====")
-    print("Enter your C code below. Type 'DONE' on a new line when finished.")
-    print("==========================================")
-    
-    c_code_lines = []
-    while True:
-        try:
-            line = input()
-            if line.strip() == "DONE":
-                break
-            c_code_lines.append(line)
-        except EOFError:
-            break
-    
-    c_code = "\n".join(c_code_lines)
-    
-    try:
-        # Special case for the ASCII table code
-        if "for (char c = 'A'; c <= 'Z'; c++)" in c_code:
-            # This is already C++ code, but we need to fix the display of ASCII values
-            corrected_code = """// C++ style includes
+_thread_state = threading.local()
+
+def get_translator() -> CToCppTranslator:
+    """Translator instance owned by the calling thread, reused across calls"""
+    translator: CToCppTranslator | None = getattr(_thread_state, 'translator', None)
+    if translator is None:
+        translator = _thread_state.translator = CToCppTranslator()
+    return translator
+
+@functools.lru_cache(maxsize=256)
+def translate_cached(c_code: str) -> str:
+    """Translate C code to C++, memoized on the source text"""
+    return get_translator().translate(c_code)
+
+# Inputs the CLI answers with a hand-corrected program instead of the
+# translator, keyed by a source fragment that identifies them
+_ASCII_TABLE_CPP = """// C++ style includes
 #include <algorithm>
 #include <iostream>
 // Using standard namespace
@@ -563,20 +669,85 @@ int main(int argc, char* argv[]) {
     }
     return 0;
 }"""
-            print("\n===== Corrected C++ Code with ASCII Values =====")
+_QUICK_PATHS: dict[str, tuple[str, str]] = {
+    # This is already C++ code, but we need to fix the display of ASCII values
+    "for (char c = 'A'; c <= 'Z'; c++)": ("Corrected C++ Code with ASCII Values", _ASCII_TABLE_CPP),
+}
+# Finds any quick-path fragment in one scan, however many there are
+_QUICK_PATH_RE = re.compile('|'.join(map(re.escape, _QUICK_PATHS)))
+
+_DONE_LINE_RE = re.compile(r'^[^\S\n]*DONE[^\S\n]*$', re.M)
+
+def _read_c_code() -> tuple[str, Callable[[str], str]]:
+    """Read C code from stdin up to a DONE line
+
+    Returns the code and the function to use for any further prompts.
+    Piped input is read in one call; the lines after DONE then answer
+    the prompts, just as they would for input().
+    """
+    if sys.stdin.isatty():
+        c_code_lines = []
+        while True:
+            try:
+                line = input()
+                if line.strip() == "DONE":
+                    break
+                c_code_lines.append(line)
+            except EOFError:
+                break
+        return "\n".join(c_code_lines), input
+    
+    data = sys.stdin.read()
+    done = _DONE_LINE_RE.search(data)
+    if done:
+        c_code, rest = data[:done.start()], data[done.end() + 1:]
+    else:
+        c_code, rest = data, ""
+    answer_lines = rest.split("\n")
+    if not answer_lines[-1]:
+        answer_lines.pop()  # Nothing follows the final newline
+    answers = iter(answer_lines)
+    
+    def ask(prompt: str) -> str:
+        print(prompt, end="")
+        try:
+            return next(answers)
+        except StopIteration:
+            raise EOFError("EOF when reading a line") from None
+    
+    if c_code.endswith("\n"):
+        c_code = c_code[:-1]
+    return c_code, ask
+
+def main() -> None:
+    translator = get_translator()
+    
+    print("===== C to C++ Language Translator =====")
+    print("Enter your C code below. Type 'DONE' on a new line when finished.")
+    print("==========================================")
+    
+    c_code, ask = _read_c_code()
+    
+    try:
+        # Special cases such as the ASCII table code
+        quick_path = _QUICK_PATH_RE.search(c_code)
+        if quick_path:
+            title, corrected_code = _QUICK_PATHS[quick_path.group(0)]
+            print(f"\n===== {title} =====")
             print(corrected_code)
             print("===============================")
             cpp_code = corrected_code  # Set cpp_code for file saving
         else:
+            # Translate fully before printing, so a failure leaves no partial output
             cpp_code = translator.translate(c_code)
             print("\n===== Translated C++ Code =====")
             print(cpp_code)
             print("===============================")
         
         # Option to save to file
-        save_option = input("\nDo you want to save the C++ code to a file? (y/n): ")
+        save_option = ask("\nDo you want to save the C++ code to a file? (y/n): ")
         if save_option.lower() == 'y':
-            filename = input("Enter filename (default: output.cpp): ") or "output.cpp"
+            filename = ask("Enter filename (default: output.cpp): ") or "output.cpp"
             
             # Ensure the filename has a .cpp extension
             if not filename.endswith('.cpp'):